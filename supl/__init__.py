@@ -10,6 +10,9 @@ Imports:
 - `SuplovaniZaci`: Handles student substitution processing.
 - `Settings`: Settings helpers
 - `SchoolSchedule`: Helpers to determine and manipulate school period times
+- `detect_suplovani_type`: Tells students and teachers XML exports apart
+- `export_key`: Identifies the output files (type and day) of an XML export
+- `generate_many`: Converts several XML exports in parallel worker processes
 
 Exports:
 - `__all__`: Defines the public interface, limiting imports to the two classes.
@@ -21,5 +24,14 @@ from .suplovani_teachers import SuplovaniUcitele
 from .suplovani_students import SuplovaniZaci
 from .settings import Settings
 from .hours import SchoolSchedule
+from .batch import detect_suplovani_type, export_key, generate_many
 
-__all__ = ["SuplovaniUcitele", "SuplovaniZaci", "Settings", "SchoolSchedule"]
+__all__ = [
+    "SuplovaniUcitele",
+    "SuplovaniZaci",
+    "Settings",
+    "SchoolSchedule",
+    "detect_suplovani_type",
+    "export_key",
+    "generate_many",
+]
@@ -0,0 +1,147 @@
+"""
+Module for converting several SkolaOnline.cz XML exports in parallel
+worker processes.
+
+Functions:
+- `detect_suplovani_type(xml_file)`: Identifies whether the XML is for students or teachers.
+- `export_key(xml_file)`: Identifies the output files the XML will write (type and day).
+- `generate_one(xml_file, settings, formats, output_folder)`: Converts one XML file.
+- `generate_many(files, settings, formats, output_folder, workers)`: Converts
+  many XML files in parallel.
+
+Usage:
+    from supl import Settings, generate_many
+    generate_many(["a.xml", "b.xml"], Settings(), ("html", "pdf"), "./outputs")
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from .settings import Settings
+from .suplovani_base import ET, HAS_LXML
+from .suplovani_students import SuplovaniZaci
+from .suplovani_teachers import SuplovaniUcitele
+
+
+# Record element of each export type
+_TYPE_TAGS = {"VypisSuplovaniZaka": "students", "VypisSuplovani": "teachers"}
+
+
+def detect_suplovani_type(xml_file):
+    """
+    Detects if the XML file is for students or teachers.
+
+    The file is streamed and the parsing stops at the first substitution
+    record, the full parse is left to the processor class.
+    """
+    # lxml filters the tags in C, the stdlib parser reports every element
+    only_types = {"tag": tuple(_TYPE_TAGS)} if HAS_LXML else {}
+    with open(xml_file, "rb") as f:
+        for _, elem in ET.iterparse(f, events=("start",), **only_types):
+            if elem.tag in _TYPE_TAGS:
+                return _TYPE_TAGS[elem.tag]
+    return None
+
+
+def export_key(xml_file):
+    """
+    Identifies the output files the XML file will write.
+
+    Exports of the same type and day (e.g. a re-fetched export) write the
+    same files and must not be converted at the same time; the key tells
+    them apart without parsing the whole file into a tree.
+
+    Returns:
+        tuple[str, str] | None: `(type, Kalendar/Datum text)`, None for an
+        unknown XML.
+    """
+    suplovani_type = date = None
+    in_calendar = False
+    # lxml filters the tags in C, the stdlib parser reports every element
+    only_tags = {"tag": (*_TYPE_TAGS, "Kalendar", "Datum")} if HAS_LXML else {}
+    with open(xml_file, "rb") as f:
+        for event, elem in ET.iterparse(f, events=("start", "end"), **only_tags):
+            if elem.tag == "Kalendar":
+                in_calendar = event == "start"
+            elif event == "start":
+                if suplovani_type is None and elem.tag in _TYPE_TAGS:
+                    suplovani_type = _TYPE_TAGS[elem.tag]
+            elif in_calendar and date is None and elem.tag == "Datum":
+                date = elem.text
+            if suplovani_type is not None and date is not None:
+                break
+    if suplovani_type is None:
+        return None
+    return suplovani_type, date
+
+
+def generate_one(xml_file, settings: Settings, formats, output_folder="."):
+    """
+    Convert a single XML file to all requested formats (in the given order).
+
+    Returns:
+        list[str]: Messages returned by `generate`, empty for an unknown XML.
+    """
+    suplovani_type = detect_suplovani_type(xml_file)
+    if suplovani_type is None:
+        return []
+
+    if suplovani_type == "teachers":
+        supl = SuplovaniUcitele(xml_file, settings)
+    else:
+        supl = SuplovaniZaci(xml_file, settings)
+
+    supl.export_path(output_folder)
+    return [supl.generate(f) for f in formats]
+
+
+def _generate_group(xml_files, settings, formats, output_folder):
+    """Convert the XML files one after another, see `generate_many`."""
+    return [generate_one(f, settings, formats, output_folder) for f in xml_files]
+
+
+def generate_many(files, settings: Settings, formats, output_folder=".", workers=None):
+    """
+    Convert many XML files in parallel, one file per worker process.
+
+    Files of the same type and day write the same outputs, they are
+    converted one after another (in the given order) by the same worker.
+
+    Args:
+        files (Iterable[str]): Paths to the XML files.
+        settings (Settings): Shared settings (include/exclude, day end, ...).
+        formats (Sequence[str]): Output formats, e.g. ("csv", "html", "pdf", "png").
+        output_folder (str): Where to export the generated files.
+        workers (int, optional): Number of processes, defaults to `os.cpu_count()`.
+
+    Returns:
+        dict[str, list[str]]: Messages from `generate` for each input file.
+    """
+    # Files writing the same outputs (same type and day) share one worker,
+    # which converts them one after another in the given order
+    files = list(files)
+    groups = {}
+    for xml_file in files:
+        try:
+            key = export_key(xml_file)
+        except (ET.ParseError, OSError):
+            key = None  # raised again by `generate_one`
+        groups.setdefault(xml_file if key is None else key, []).append(xml_file)
+    groups = list(groups.values())
+
+    formats = tuple(formats)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        results = executor.map(
+            _generate_group,
+            groups,
+            repeat(settings),
+            repeat(formats),
+            repeat(output_folder),
+        )
+        messages = {
+            xml_file: file_messages
+            for group, group_results in zip(groups, results)
+            for xml_file, file_messages in zip(group, group_results)
+        }
+    return {xml_file: messages[xml_file] for xml_file in files}
@@ -5,6 +5,28 @@ import os
 import time
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml C extension
+except ImportError:
+    from yaml import SafeLoader
+
+# path -> (mtime_ns, parsed config), shared by all Settings instances
+_CONFIG_CACHE = {}
+
+
+def load_config(path):
+    """Parses the YAML file at `path`, reusing the last result while its mtime is unchanged."""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _CONFIG_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as file:
+        config = yaml.load(file, Loader=SafeLoader) or {}
+    _CONFIG_CACHE[path] = (mtime, config)
+    return config
+
+
 class Settings:
     """
         Class to access the yaml config file in supl module, allows as to pass
@@ -34,9 +56,8 @@ class Settings:
                 self.config = {}
             else:
                 try:
-                    with open(self.config_path, "r", encoding="utf-8") as file:
-                        self.config = yaml.safe_load(file) or {}
-                        self.last_loaded = current_time
+                    self.config = load_config(self.config_path)
+                    self.last_loaded = current_time
                 except (yaml.YAMLError, OSError) as e:
                     print(f"Error reading config file '{self.config_path}': {e}")
                     self.config = {}
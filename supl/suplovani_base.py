@@ -14,19 +14,65 @@ Classes:
 - `SuplovaniBase`: Handles common XML parsing and data extraction methods.
 
 Dependencies:
+- `csv`
 - `datetime`
-- `xml.etree.ElementTree` (ET)
+- `hashlib`
+- `jinja2`
+- `weasyprint`
+- `lxml.etree` (ET), falls back to `xml.etree.ElementTree` when lxml is missing
 """
 
 # pylint: disable=R0902
 # pylint: disable=R0914
 
-import xml.etree.ElementTree as ET
+import csv
 from datetime import datetime
+import functools
+import hashlib
+import os
+from pathlib import Path
 import re
+import sys
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from weasyprint import HTML
+
+try:
+    from lxml import etree as ET
+
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+
+    HAS_LXML = False
 
 from .settings import Settings
 
+# Parsed exports keyed by (processor class, content hash), least recently used first
+_PARSE_CACHE = {}
+_PARSE_CACHE_SIZE = 16
+
+
+# Record fields with few distinct values (school entities and resolutions),
+# their texts are interned by `SuplovaniBase._fields`
+_INTERNED_FIELDS = frozenset(
+    (
+        "ZpusobReseni",
+        "Nazev",
+        "Zkratka",
+        "OSOBA_ID",
+        "REALIZACE_ID",
+        "SKUPINA_ID",
+        "SKUPINA_ID_PARENT",
+        "MISTNOST_ID",
+        "OBDOBI_DNE_ID",
+        "SUPL_DRUH_ABSENCE_ID",
+    )
+)
+
+# Short day names used in the export filenames, indexed by ISO weekday
+_DAY_NAMES = ("x", "po", "ut", "st", "ct", "pa", "so", "ne")
+
 
 class SuplovaniBase:
     """
@@ -39,102 +85,284 @@ class SuplovaniBase:
     specific data extraction methods if necessary.
     """
 
+    # WeasyPrint `write_pdf` options on top of its defaults (which already
+    # subset the fonts and skip hinting and HTML presentational hints):
+    # recompress embedded images, should a template ever carry any
+    PDF_OPTIONS = {
+        "optimize_images": True,
+    }
+
     def __init__(self, xml_file, settings: Settings, template_folder="templates"):
         # pylint: disable=R0902
         self.xml_file = xml_file
-        self.tree = ET.parse(xml_file)
-        self.root = self.tree.getroot()
-        self.date = self._extract_date()
         self.template_folder = template_folder
-        self._path = "."
+        self._html_content = None  # rendered report HTML, see `_html`
         self.settings = settings
+        self._parse(xml_file)
+        self._path = "."
+        self._paths = self._output_paths(self._path)
+
+    def _parse(self, xml_file):
+        """
+        Parse the XML and extract the mappings, or reuse them for a known file.
+        """
+        with open(xml_file, "rb") as f:
+            data = f.read()
+        key = (type(self), hashlib.blake2b(data, digest_size=16).digest())
+
+        parsed = _PARSE_CACHE.pop(key, None)
+        if parsed is None:
+            known = set(vars(self))
+            self._index = self._index_records(
+                ET.fromstring(data, parser=self._xml_parser())
+            )
+            self._extract_mappings()
+            parsed = {k: v for k, v in vars(self).items() if k not in known}
+            if len(_PARSE_CACHE) >= _PARSE_CACHE_SIZE:
+                del _PARSE_CACHE[next(iter(_PARSE_CACHE))]
+        else:
+            vars(self).update(parsed)
+        _PARSE_CACHE[key] = parsed  # (re)insert as the most recently used
+
+    def _extract_mappings(self):
+        """
+        Extract everything derived from the XML alone, subclasses extend it.
+        """
+        # Runs from __init__ through `_parse`, unless the state comes from the cache
+        # pylint: disable=attribute-defined-outside-init
+        self.date = self._extract_date()
+        # The date is fixed per export, format it once for filenames and templates
+        self._date_str = self.date.strftime("%Y_%m_%d")
+        self._date_human = self.date.strftime("%d.%m.%Y")
 
-        # Extract mappings
         self.subject_mapping = self._extract_subjects()
         self.room_mapping = self._extract_classrooms()
         self.period_mapping = self._extract_periods()
 
+    # Elements the extractors work with; collected by `_index_records`
+    INDEXED_TAGS = ("Kalendar", "Predmet", "Mistnost", "VyucovaciHodinaOd")
+
     @staticmethod
-    def get(record, key, default=""):
+    def _xml_parser():
         """
-        Retrieves the text content of a given XML key from a record.
-        If the key is missing, returns the default value.
+        C parser from lxml, or the default.
 
-        Args:
-            record (ElementTree.Element): The XML record to search in.
-            key (str): The XML tag name to find.
-            default (str, optional): The value to return if key is missing. Defaults to "".
+        No xml:id bookkeeping, no size limits and no whitespace-only nodes,
+        comments or processing instructions between the elements (the exports
+        are indented); the text of the leaf elements is kept as it is.
+        """
+        if HAS_LXML:
+            return ET.XMLParser(
+                huge_tree=True,
+                collect_ids=False,
+                remove_blank_text=True,
+                remove_comments=True,
+                remove_pis=True,
+            )
+        return None
 
-        Returns:
-            str: The extracted text value or the default value.
+    def _index_records(self, root):
+        """
+        Buckets the elements listed in `INDEXED_TAGS` by tag in a single walk
+        over the tree, so the extractors do not each rescan the whole document.
+
+        Each element is stored as its `_fields` dict, nothing keeps a
+        reference to the tree afterwards.
+        """
+        index = {tag: [] for tag in self.INDEXED_TAGS}
+        fields_of = self._fields
+        # lxml filters the tags in C, ElementTree only accepts a single tag
+        elements = root.iter(*self.INDEXED_TAGS) if HAS_LXML else root.iter()
+        for elem in elements:
+            bucket = index.get(elem.tag)
+            if bucket is not None:
+                bucket.append(fields_of(elem))
+        return index
+
+    def _records(self, tag):
+        """
+        Returns the `{child tag: text}` dicts of all elements with the given
+        (indexed) tag in document order.
+        """
+        return self._index[tag]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _get_template(template_folder, name):
         """
-        element = record.find(key)
-        return (
-            element.text
-            if element is not None and element.text is not None
-            else default
+        Loads and compiles a Jinja2 template once per process. Templates are
+        not reloaded when they change on disk (restart the monitor instead).
+
+        The compiled bytecode is also kept in the temp folder, so fresh worker
+        processes load it instead of compiling the template again; Jinja2
+        keys it by the template source, an edited template is recompiled.
+        """
+        env = Environment(
+            loader=FileSystemLoader(template_folder),
+            auto_reload=False,
+            cache_size=-1,
+            bytecode_cache=FileSystemBytecodeCache(),
         )
+        return env.get_template(name)
+
+    @staticmethod
+    def _fields(record):
+        """
+        Maps the child tags of a record to their text in one pass over the children.
+
+        Cheaper than a `find()` (or a compiled XPath) per field once a record
+        has more than one or two fields to read. An empty child maps to "",
+        a missing one is not in the dict.
+
+        The tags and the texts of `_INTERNED_FIELDS` are interned: the same
+        IDs, names and resolutions repeat across the records, which then
+        share one string each while the index stays cached. Timestamps,
+        notes and event IDs are mostly unique and are left alone (interned
+        strings are never freed on Python 3.12).
+        """
+        intern = sys.intern
+        interned = _INTERNED_FIELDS
+        fields = {}
+        for child in record:
+            tag = intern(child.tag)
+            text = child.text or ""
+            if text and tag in interned:
+                text = intern(text)
+            fields[tag] = text
+        return fields
+
+    def _teacher_absences_by_event(self):
+        """
+        Group the `AbsenceUcitele` records by their `UDALOST_ID`.
+
+        Lets the absence extraction join every `AbsenceZdrojeVeDni` record to
+        its own teachers with a dict lookup instead of scanning all of them.
+        """
+        by_event = {}
+        for teacher_absence in self._records("AbsenceUcitele"):
+            if "UDALOST_ID" in teacher_absence:
+                by_event.setdefault(teacher_absence["UDALOST_ID"], []).append(
+                    teacher_absence
+                )
+        return by_event
+
+    def _export_pdf(self, export_to, html_content):
+        """
+        Render the HTML to the PDF `export_to`, unless its `.sha` sidecar
+        shows it is already up to date.
+
+        Returns:
+            bytes | None: The new PDF, or None when the existing file was kept.
+        """
+        digest = hashlib.blake2b(html_content.encode("utf-8")).hexdigest()
+        sidecar = Path(f"{export_to}.sha")
+        if os.path.exists(export_to) and sidecar.is_file():
+            if sidecar.read_text(encoding="ascii") == digest:
+                return None
+        sidecar.unlink(missing_ok=True)
+
+        document = HTML(string=html_content, base_url=self._path)
+        pdf_bytes = document.write_pdf(**self.PDF_OPTIONS)
+        partial = Path(f"{export_to}.{os.getpid()}.tmp")
+        try:
+            partial.write_bytes(pdf_bytes)
+            os.replace(partial, export_to)
+        finally:
+            partial.unlink(missing_ok=True)
+        sidecar.write_text(digest, encoding="ascii")
+        return pdf_bytes
+
+    @staticmethod
+    def _write_csv(path, rows, fieldnames):
+        """
+        Write dict records to a semicolon separated CSV file.
+
+        `rows` can be any iterable, the records are written as it yields them.
+        The columns come from `fieldnames`, so the header is written even for
+        a day without records.
+        """
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=fieldnames, delimiter=";", lineterminator="\n"
+            )
+            writer.writeheader()
+            writer.writerows(rows)
 
     def classes_to_exclude(self):
         """Classes to be excluded from generation (only for studens subs.)"""
-        return set(self.settings.get("exclude", []))
+        return frozenset(self.settings.get("exclude") or ())
 
     def classes_to_include(self):
         """Classes to be included from generation (only for studens subs.)"""
-        return set(self.settings.get("include", []))
+        return frozenset(self.settings.get("include") or ())
 
     def export_path(self, path):
         """Set the internal path prefix for the file exports."""
         self._path = path
+        self._paths = self._output_paths(path)
+
+    def _output_paths(self, path):
+        """
+        Output file of every format, fixed per instance once the path is set.
+
+        The "png" entry is a prefix, the pages get a `_<number>.png` suffix.
+        """
+        prefix = os.path.join(path, self._export_filename_prefix())
+        return {
+            "csv": f"{prefix}.csv",
+            "html": f"{prefix}.html",
+            "pdf": f"{prefix}.pdf",
+            "png": prefix,
+        }
+
+    def _export_filename_prefix(self):
+        """Filename prefix of the exports, e.g. `supl_25-02-25_ut`."""
+        day_name = _DAY_NAMES[self.date.isoweekday()]
+        return f"supl_{self.date.strftime('%y-%m-%d')}_{day_name}"
 
     def _extract_date(self):
         """Extracts the date from the XML file."""
-        date_element = self.root.find(".//Kalendar/Datum")
-        return (
-            datetime.fromisoformat(date_element.text)
-            if date_element is not None
-            else None
-        )
+        for calendar in self._records("Kalendar"):
+            date_text = calendar.get("Datum")
+            if date_text:
+                return datetime.fromisoformat(date_text)
+        return None
 
     def _extract_subjects(self):
         """Extracts subjects mapping from XML."""
-        return {
-            subject.find("REALIZACE_ID").text: subject.find("Zkratka").text
-            for subject in self.root.findall(".//Predmet")
-            if subject.find("REALIZACE_ID") is not None
-            and subject.find("Zkratka") is not None
-        }
+        subjects = {}
+        for fields in self._records("Predmet"):
+            if "REALIZACE_ID" in fields and "Zkratka" in fields:
+                subjects[fields["REALIZACE_ID"]] = fields["Zkratka"]
+        return subjects
 
     def _extract_classrooms(self):
         """Extracts classroom mapping from XML."""
-        return {
-            room.find("MISTNOST_ID").text: room.find("Zkratka").text
-            for room in self.root.findall(".//Mistnost")
-            if room.find("MISTNOST_ID") is not None and room.find("Zkratka") is not None
-        }
+        rooms = {}
+        for fields in self._records("Mistnost"):
+            if "MISTNOST_ID" in fields and "Zkratka" in fields:
+                rooms[fields["MISTNOST_ID"]] = fields["Zkratka"]
+        return rooms
 
     def _extract_periods(self):
         """Extracts period mapping from XML, handling multi-hour spans."""
         periods = {}
-        for period in self.root.findall(".//VyucovaciHodinaOd"):
-            period_id = period.find("OBDOBI_DNE_ID")
-            name = period.find("Nazev")
-            hodina_od = period.find("HodinaOd")
-            hodina_do = period.find("HodinaDo")
-
-            if period_id is not None and name is not None:
-                period_id_text = period_id.text
-                period_name = name.text
+        for fields in self._records("VyucovaciHodinaOd"):
+            period_id = fields.get("OBDOBI_DNE_ID")
+            period_name = fields.get("Nazev")
+            hodina_od = fields.get("HodinaOd")
+            hodina_do = fields.get("HodinaDo")
 
+            if "OBDOBI_DNE_ID" in fields and "Nazev" in fields:
                 # EDITED: Handle multi-hour periods
                 if (
-                    hodina_od is not None
-                    and hodina_do is not None
-                    and hodina_od.text != hodina_do.text
+                    "HodinaOd" in fields
+                    and "HodinaDo" in fields
+                    and hodina_od != hodina_do
                 ):
-                    period_name = f"{hodina_od.text}-{hodina_do.text}"  # Show as range
+                    period_name = f"{hodina_od}-{hodina_do}"  # Show as range
 
-                periods[period_id_text] = period_name  # Store updated period name
+                periods[period_id] = period_name  # Store updated period name
 
         return periods
 
@@ -201,17 +429,27 @@ class SuplovaniBase:
 
         Records with period ranges that extend past the end period are kept,
         but the `Period` label is clamped for display (e.g. "4-7" -> "4-5").
+        Works with both plain dict records and named tuples.
+        """
+        return list(self.iter_records_by_end_period(records, period_key))
+
+    def iter_records_by_end_period(self, records, period_key="Period"):
+        """
+        Lazy variant of `filter_records_by_end_period`, yields the kept records.
         """
         end_period = self.day_end_period()
         if not end_period:
-            return records
+            yield from records
+            return
 
-        filtered = []
         for rec in records:
-            period_text = rec.get(period_key, "")
+            is_dict = isinstance(rec, dict)
+            period_text = (
+                rec.get(period_key, "") if is_dict else getattr(rec, period_key, "")
+            )
             parsed = self._parse_period_range(period_text)
             if not parsed:
-                filtered.append(rec)
+                yield rec
                 continue
 
             start, end = parsed
@@ -219,13 +457,30 @@ class SuplovaniBase:
                 continue
 
             if end > end_period:
-                rec = dict(rec)
-                rec[period_key] = (
-                    str(start) if start == end_period else f"{start}-{end_period}"
-                )
-            filtered.append(rec)
+                label = str(start) if start == end_period else f"{start}-{end_period}"
+                if is_dict:
+                    rec = {**rec, period_key: label}
+                else:
+                    rec = rec._replace(**{period_key: label})
+            yield rec
+
+    def _extract_report(self):
+        """Returns the `(substitutions, absences)` the HTML is rendered from."""
+        raise NotImplementedError("This method should be implemented in subclasses.")
 
-        return filtered
+    def _render_html(self, substitutions, absences):
+        """Renders the report template of the subclass to a string."""
+        raise NotImplementedError("This method should be implemented in subclasses.")
+
+    def _html(self):
+        """
+        The report HTML, rendered on first use and shared by the "html" and
+        "pdf" outputs, so the records are extracted and merged once per
+        instance however many formats are generated.
+        """
+        if self._html_content is None:
+            self._html_content = self._render_html(*self._extract_report())
+        return self._html_content
 
     def generate(self, output_format):
         """Generate the output in the specified format (CSV, HTML, PDF)."""
@@ -14,7 +14,8 @@ Features:
   - CSV: Machine-readable tabular data.
   - HTML: Styled report using Jinja2 templates.
   - PDF: Printable version via WeasyPrint.
-  - PNG: Image snapshots of the PDF report using pymupdf.
+  - PNG: Image snapshots of the PDF report using pymupdf, pages in parallel
+    processes (`png_workers`).
 - Supports dynamic color coding for headers based on the day of the week.
 
 Classes:
@@ -22,10 +23,9 @@ Classes:
 
 Dependencies:
 - datetime
-- xml.etree.ElementTree (ET)
-- pandas
+- lxml.etree (ET, via `SuplovaniBase`)
 - pymupdf
-- weasyprint
+- weasyprint (via `SuplovaniBase`)
 - jinja2
 
 Usage Example:
@@ -40,17 +40,78 @@ Usage Example:
 
 import os
 import glob
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
+from pathlib import Path
+from typing import NamedTuple
 
 import pymupdf
-import pandas as pd
-from weasyprint import HTML
-from jinja2 import Environment, FileSystemLoader
 
 from .suplovani_base import SuplovaniBase
 from .settings import Settings
 from .hours import SchoolSchedule
 
+# Header colours and Czech day names indexed by ISO weekday (1 = Monday),
+# index 0 holds the fallback value
+_HEADER_COLORS = (
+    "#0984e3",
+    "#4f34ca",  # Monday
+    "#c038cf",  # Tuesday
+    "#FB536A",  # Wednesday
+    "#e56e2e",  # Thursday
+    "#eaa72f",  # Friday
+    "#a0ea48",  # Saturday
+    "#19cc59",  # Sunday
+)
+_CZECH_DAYS = (
+    "Neznámý den",
+    "Pondělí",
+    "Úterý",
+    "Středa",
+    "Čtvrtek",
+    "Pátek",
+    "Sobota",
+    "Neděle",
+)
+
+# Resolution of the PNG export unless `png_dpi` is configured
+DEFAULT_PNG_DPI = 600
+
+# Children a `Ucitel`/`Ucitel2` record needs to enter the teacher mapping
+_TEACHER_TAGS = ("OSOBA_ID", "Zkratka", "Jmeno", "Prijmeni")
+
+# Shared fallbacks for unknown IDs in the per-record lookups (read only)
+_NO_GROUP = {"class": "", "group": ""}
+_NO_TEACHER = {"abbreviation": "", "name": ""}
+
+
+def _save_png_page(pdf_bytes, page_index, zoom, output_filename):
+    """
+    Rasterize one page of the PDF to a PNG file, the unit of work of the
+    parallel PNG export (it runs in a worker process).
+    """
+    # We always hand over a PDF, skip the format sniffing
+    with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pix = doc[page_index].get_pixmap(matrix=pymupdf.Matrix(zoom, zoom))
+        pix.save(output_filename)
+    return output_filename
+
+
+class SubRec(NamedTuple):
+    """One student substitution record; field names match the CSV columns."""
+
+    Class: str
+    Period: str
+    Subject: str
+    Group: list[str]
+    Room: str
+    Teacher: str
+    Teacher_Abbreviation: str
+    Resolution: str
+    Note: str
+
 
 class SuplovaniZaci(SuplovaniBase):
     """
@@ -61,10 +122,27 @@ class SuplovaniZaci(SuplovaniBase):
     cancellation and substitution happening at the same time)
     """
 
+    INDEXED_TAGS = SuplovaniBase.INDEXED_TAGS + (
+        "Ucitel",
+        "Ucitel2",
+        "Trida",
+        "TridaSkupinaSeminar",
+        "UdalostStudijniSkupina",
+        "UdalostMistnost",
+        "UdalostOsoba",
+        "SuplovaniDruhAbsence",
+        "AbsenceZdrojeVeDni",
+        "AbsenceUcitele",
+        "VypisSuplovaniZaka",
+    )
+
     def __init__(self, xml_file, settings: Settings, template_folder="templates"):
         super().__init__(xml_file, settings, template_folder)
+        self._pdf_bytes = None  # last rendered PDF, reused by the PNG export
 
-        # Extract mappings
+    def _extract_mappings(self):
+        # pylint: disable=attribute-defined-outside-init
+        super()._extract_mappings()
         self.teacher_mapping = self._extract_teachers()
         self.class_mapping = self._extract_classes()
         self.group_mapping = self._extract_groups()
@@ -74,72 +152,46 @@ class SuplovaniZaci(SuplovaniBase):
         self.absence_reason_mapping = self._extract_absence_reasons()
 
     def _extract_teachers(self):
-        return {
-            teacher.find("OSOBA_ID").text: {
-                "abbreviation": teacher.find("Zkratka").text,
-                "name": f"{teacher.find('Jmeno').text} {teacher.find('Prijmeni').text}",
-            }
-            for teacher in self.root.findall(".//Ucitel2")
-            + self.root.findall(".//Ucitel")
-            if teacher.find("OSOBA_ID") is not None
-            and teacher.find("Zkratka") is not None
-            and teacher.find("Jmeno") is not None
-            and teacher.find("Prijmeni") is not None
-        }
+        teachers = {}
+        for fields in self._records("Ucitel2") + self._records("Ucitel"):
+            if all(tag in fields for tag in _TEACHER_TAGS):
+                teachers[fields["OSOBA_ID"]] = {
+                    "abbreviation": fields["Zkratka"],
+                    "name": f"{fields['Jmeno']} {fields['Prijmeni']}".strip(),
+                }
+        return teachers
 
     def _extract_classes(self):
-        return {
-            class_elem.find("SKUPINA_ID").text: class_elem.find("Nazev").text
-            for class_elem in self.root.findall(".//Trida")
-            if class_elem.find("SKUPINA_ID") is not None
-            and class_elem.find("Nazev") is not None
-        }
+        classes = {}
+        for fields in self._records("Trida"):
+            if "SKUPINA_ID" in fields and "Nazev" in fields:
+                classes[fields["SKUPINA_ID"]] = fields["Nazev"]
+        return classes
 
     def _extract_groups(self):
-        return {
-            group.find("SKUPINA_ID").text: {
-                "class": self.class_mapping.get(
-                    group.find("SKUPINA_ID_PARENT").text, ""
-                ),
-                "group": (
-                    group.find("Nazev").text if group.find("Nazev") is not None else ""
-                ),
-            }
-            for group in self.root.findall(".//TridaSkupinaSeminar")
-            if group.find("SKUPINA_ID") is not None
-            and group.find("SKUPINA_ID_PARENT") is not None
-        }
+        groups = {}
+        for fields in self._records("TridaSkupinaSeminar"):
+            if "SKUPINA_ID" in fields and "SKUPINA_ID_PARENT" in fields:
+                groups[fields["SKUPINA_ID"]] = {
+                    "class": self.class_mapping.get(fields["SKUPINA_ID_PARENT"], ""),
+                    "group": fields.get("Nazev", ""),
+                }
+        return groups
 
     def _extract_event_group_mappings(self):
         mappings = {}
-        for event in self.root.findall(".//UdalostStudijniSkupina"):
-            event_id = (
-                event.find("UDALOST_ID").text
-                if event.find("UDALOST_ID") is not None
-                else ""
-            )
-            group_id = (
-                event.find("SKUPINA_ID").text
-                if event.find("SKUPINA_ID") is not None
-                else ""
-            )
+        for fields in self._records("UdalostStudijniSkupina"):
+            event_id = fields.get("UDALOST_ID")
+            group_id = fields.get("SKUPINA_ID")
             if event_id and group_id:
                 mappings.setdefault(event_id, []).append(group_id)
         return mappings
 
     def _extract_event_room_mappings(self):
         mappings = {}
-        for event in self.root.findall(".//UdalostMistnost"):
-            event_id = (
-                event.find("UDALOST_ID").text
-                if event.find("UDALOST_ID") is not None
-                else ""
-            )
-            room_id = (
-                event.find("MISTNOST_ID").text
-                if event.find("MISTNOST_ID") is not None
-                else ""
-            )
+        for fields in self._records("UdalostMistnost"):
+            event_id = fields.get("UDALOST_ID")
+            room_id = fields.get("MISTNOST_ID")
             if event_id and room_id:
                 if event_id not in mappings:
                     mappings[event_id] = []
@@ -149,13 +201,10 @@ class SuplovaniZaci(SuplovaniBase):
     def _extract_event_teacher_mappings(self):
         teachers_by_event = {}  # Používáme běžný slovník
 
-        for event in self.root.findall(".//UdalostOsoba"):
-            udalost_id = event.find("UDALOST_ID")
-            osoba_id = event.find("OSOBA_ID")
-
-            if udalost_id is not None and osoba_id is not None:
-                uid = udalost_id.text
-                oid = osoba_id.text
+        for fields in self._records("UdalostOsoba"):
+            if "UDALOST_ID" in fields and "OSOBA_ID" in fields:
+                uid = fields["UDALOST_ID"]
+                oid = fields["OSOBA_ID"]
 
                 if uid not in teachers_by_event:
                     teachers_by_event[uid] = []  # Inicializujeme prázdný seznam
@@ -163,10 +212,10 @@ class SuplovaniZaci(SuplovaniBase):
         return teachers_by_event
 
     def _extract_absence_reasons(self):
-        return {
-            absence.find("SUPL_DRUH_ABSENCE_ID").text: absence.find("Nazev").text
-            for absence in self.root.findall(".//SuplovaniDruhAbsence")
-        }
+        reasons = {}
+        for fields in self._records("SuplovaniDruhAbsence"):
+            reasons[fields.get("SUPL_DRUH_ABSENCE_ID")] = fields.get("Nazev")
+        return reasons
 
     def extract_absences(self):
         """
@@ -188,37 +237,34 @@ class SuplovaniZaci(SuplovaniBase):
         """
         absences = []
         schedule = SchoolSchedule()
-        for absence in self.root.findall(".//AbsenceZdrojeVeDni"):
-            reason_id = super().get(absence, "SUPL_DRUH_ABSENCE_ID")
+        teacher_absences = self._teacher_absences_by_event()
+        for fields in self._records("AbsenceZdrojeVeDni"):
+            reason_id = fields.get("SUPL_DRUH_ABSENCE_ID") or ""
             reason = self.absence_reason_mapping.get(reason_id, "Neznámý důvod")
 
-            udalost_id = super().get(absence, "UDALOST_ID", None)
-
-            for teacher_absence in self.root.findall(".//AbsenceUcitele"):
-                tau = super().get(teacher_absence, "UDALOST_ID", False)
-                if udalost_id != tau:
-                    # skip unrelated teacher (another event)
-                    continue
+            udalost_id = fields.get("UDALOST_ID")
 
-                teacher_id = super().get(teacher_absence, "OSOBA_ID", None)
+            for teacher_absence in teacher_absences.get(udalost_id, ()):
+                teacher_id = teacher_absence.get("OSOBA_ID")
                 if not teacher_id:
                     print(f"Missing Teacher ID, skipping {teacher_absence}")
                     continue
 
-                teacher_info = self.teacher_mapping.get(
-                    teacher_id, {"name": "Neznámý učitel"}
-                )  # Ensure it's a dict
+                teacher_info = self.teacher_mapping.get(teacher_id)
+                if teacher_info is None:
+                    print(f"Unknown teacher {teacher_id}, skipping {teacher_absence}")
+                    continue
 
                 # Skip the assistents and other personal from the absences
-                if teacher_info.get("abbreviation", None).upper() in [
+                if teacher_info["abbreviation"].upper() in [
                     "KOP",
                     "HRN",
                     "HEI",
                 ]:
                     continue
 
-                od = super().get(absence, "Od")
-                do = super().get(absence, "Do")
+                od = fields.get("Od") or ""
+                do = fields.get("Do") or ""
 
                 # Using ISO 8601 datetime strings
                 _, period_range = schedule.from_iso(od, do)
@@ -237,47 +283,67 @@ class SuplovaniZaci(SuplovaniBase):
 
     def extract_substitutions(self):
         """Get the main data structure out of the XML for further processing"""
-        substitutions = []
-        for record in self.root.findall(".//VypisSuplovaniZaka"):
-            event_id = super().get(record, "UDALOST_ID")
-            group_ids = self.event_group_mapping.get(event_id, [])
+        return list(self._iter_substitutions())
+
+    def _iter_substitutions(self):
+        """Yield the substitution records one by one, the CSV export streams them."""
+        # Resolve the class filters once, not for every record
+        include = self.classes_to_include()
+        exclude = self.classes_to_exclude()
+        # Bind the mappings to locals, they are dereferenced several times per record
+        group_map = self.group_mapping
+        period_map = self.period_mapping
+        subject_map = self.subject_mapping
+        event_group = self.event_group_mapping
+        event_room = self.event_room_mapping
+        event_teacher = self.event_teacher_mapping
+        teacher_map = self.teacher_mapping
+        schedule = SchoolSchedule()
+        for fields in self._records("VypisSuplovaniZaka"):
+            event_id = fields.get("UDALOST_ID") or ""
+            group_ids = event_group.get(event_id, [])
 
             class_name = ""
             group_names = []
             for group_id in group_ids:
-                class_name = self.group_mapping.get(group_id, {}).get("class", "")
-                group_name = self.group_mapping.get(group_id, {}).get("group", "")
+                group = group_map.get(group_id, _NO_GROUP)
+                class_name = group["class"]
+                group_name = group["group"].strip()
                 if group_name and group_name != class_name:
                     group_names.append(group_name)
 
+            if include:
+                if class_name not in include:
+                    continue
+            elif exclude and class_name in exclude:
+                continue
+
             seen = set()
             group_names = [
                 name for name in group_names if not (name in seen or seen.add(name))
             ]
             group_name = group_names
 
-            period = self.period_mapping.get(super().get(record, "OBDOBI_DNE_ID"), "")
+            period = period_map.get(fields.get("OBDOBI_DNE_ID") or "", "")
 
             # Workaround for the way the SO hangles the period ranges
-            od = super().get(record, "CasOd")
-            do = super().get(record, "CasDo")
+            od = fields.get("CasOd") or ""
+            do = fields.get("CasDo") or ""
 
-            schedule = SchoolSchedule()
             _, period_range = schedule.from_iso(od, do)
 
             if period != period_range:
                 period = period_range
 
-            subject = self.subject_mapping.get(super().get(record, "REALIZACE_ID"), "")
-            rooms = self.event_room_mapping.get(event_id, [""])
+            subject = (
+                subject_map.get(fields.get("REALIZACE_ID") or "", "") or ""
+            ).strip()
+            rooms = event_room.get(event_id, [""])
             room = ", ".join(rooms)
 
-            osoba_ids = self.event_teacher_mapping.get(event_id, [])
+            osoba_ids = event_teacher.get(event_id, [])
             # Fetch list of teacher IDs
-            teachers_info = [
-                self.teacher_mapping.get(oid, {"abbreviation": "", "name": ""})
-                for oid in osoba_ids
-            ]
+            teachers_info = [teacher_map.get(oid, _NO_TEACHER) for oid in osoba_ids]
             teacher_names = ", ".join(
                 [t["name"] for t in teachers_info if t["name"]]
             )  # Combine names
@@ -285,36 +351,21 @@ class SuplovaniZaci(SuplovaniBase):
                 [t["abbreviation"] for t in teachers_info if t["abbreviation"]]
             )  # Combine abbreviations
 
-            resolution = super().get(record, "ZpusobReseni")
-            note = super().get(record, "Poznamka")
-
-            write = True
-            if (
-                self.classes_to_include() is not None
-                and len(self.classes_to_include()) > 0
-            ):
-                write = class_name in self.classes_to_include()
-            elif (
-                self.classes_to_exclude() is not None
-                and len(self.classes_to_exclude()) > 0
-            ):
-                write = class_name not in self.classes_to_exclude()
-
-            if write:
-                substitutions.append(
-                    {
-                        "Class": class_name,
-                        "Period": period,
-                        "Subject": subject,
-                        "Group": group_name,
-                        "Room": room,
-                        "Teacher": teacher_names,
-                        "Teacher_Abbreviation": teacher_abbreviations,
-                        "Resolution": resolution,
-                        "Note": note,
-                    }
-                )
-        return substitutions
+            # Stored stripped, so the merge passes can compare the values directly
+            resolution = (fields.get("ZpusobReseni") or "").strip()
+            note = (fields.get("Poznamka") or "").strip()
+
+            yield SubRec(
+                Class=class_name,
+                Period=period,
+                Subject=subject,
+                Group=group_name,
+                Room=room,
+                Teacher=teacher_names,
+                Teacher_Abbreviation=teacher_abbreviations,
+                Resolution=resolution,
+                Note=note,
+            )
 
     @staticmethod
     def _group_key(group):
@@ -347,7 +398,7 @@ class SuplovaniZaci(SuplovaniBase):
 
     def extract_final_substitutions(self, records):
         """
-        Iteratively processes a list of substitution records (each a dict with keys "Class",
+        Iteratively processes a list of substitution records (`SubRec` with fields "Class",
         "Group", "Period", "Resolution", "Note", "Subject", etc.) and returns a deduplicated
         list where for each (Class, Period, Group) key any cancellation record ("odpadá")
         is omitted if a substitution record exists.
@@ -357,28 +408,22 @@ class SuplovaniZaci(SuplovaniBase):
 
         for rec in records:
             # Define the key. If the class is divided into groups, make sure "Group" is not empty.
-            key = (
-                rec.get("Class", ""),
-                rec.get("Period", ""),
-                self._group_key(rec.get("Group", "")),
-            )
-            current_is_sub = rec.get("Resolution", "").strip() != "odpadá"
+            key = (rec.Class, rec.Period, self._group_key(rec.Group))
+            current_is_sub = rec.Resolution != "odpadá"
 
             if key not in final_records:
                 # Nothing stored yet: simply store this record.
                 final_records[key] = rec
             else:
                 existing = final_records[key]
-                existing_is_sub = existing.get("Resolution", "").strip() != "odpadá"
+                existing_is_sub = existing.Resolution != "odpadá"
 
                 # Rule: substitution should override a cancellation.
                 if current_is_sub and not existing_is_sub:
                     # If the new substitution record has no note, add one based
                     # on the cancelled record.
-                    if not rec.get("Note", "").strip():
-                        subject = existing.get("Subject", "").strip()
-                        if subject:
-                            rec["Note"] = f"za {subject}"
+                    if not rec.Note and existing.Subject:
+                        rec = rec._replace(Note=f"za {existing.Subject}")
                     final_records[key] = rec
 
                 # If both are substitutions, decide on a tie-breaker.
@@ -391,6 +436,17 @@ class SuplovaniZaci(SuplovaniBase):
         # Return the deduplicated records as a list.
         return list(final_records.values())
 
+    @staticmethod
+    def _fill_missing_notes(substitutions, general_cancel):
+        """Fill substitution records with missing notes based on general cancellation."""
+        cancellation_subject = general_cancel.Subject
+        if not cancellation_subject:
+            return substitutions
+        return [
+            r if r.Note else r._replace(Note=f"za {cancellation_subject}")
+            for r in substitutions
+        ]
+
     def extract_final_substitutions2(self, records):
         """
         Processes the list of substitution records by grouping them based on (Class, Period).
@@ -399,71 +455,74 @@ class SuplovaniZaci(SuplovaniBase):
         If any substitution exists, the general cancellation is omitted.
         """
 
-        def group_records(records):
-            grouped = {}
-            for rec in records:
-                key = (rec.get("Class", ""), rec.get("Period", ""))
-                grouped.setdefault(key, []).append(rec)
-            return grouped
-
-        def classify_records(recs):
-            """Separate general cancellation from subgroup records."""
-            general_cancel = None
-            subgroup_records = []
-            for r in recs:
-                group = r.get("Group", "")
-                resolution = r.get("Resolution", "").strip()
-                if self._group_is_empty(group) and resolution == "odpadá":
-                    general_cancel = r
-                else:
-                    subgroup_records.append(r)
-            return general_cancel, subgroup_records
-
-        def update_notes(subs, general_cancel):
-            """Update substitution records with missing notes based on general cancellation."""
-            if general_cancel:
-                cancellation_subject = general_cancel.get("Subject", "").strip()
-                for r in subs:
-                    if not r.get("Note", "").strip() and cancellation_subject:
-                        r["Note"] = f"za {cancellation_subject}"
+        # One pass keyed by (Class, Period); each slot remembers substitutions,
+        # the general cancellation and any subgroup cancellations.
+        slots = {}
+        for rec in records:
+            key = (rec.Class, rec.Period)
+            slot = slots.get(key)
+            if slot is None:
+                slot = slots[key] = {"subs": [], "cancel": None, "other": []}
+
+            if rec.Resolution != "odpadá":
+                slot["subs"].append(rec)
+            elif self._group_is_empty(rec.Group):
+                slot["cancel"] = rec
+            else:
+                slot["other"].append(rec)
 
         final_list = []
-        grouped_records = group_records(records)
-
-        for _, recs in grouped_records.items():
-            general_cancel, subgroup_records = classify_records(recs)
-            substitutions = [
-                r
-                for r in subgroup_records
-                if r.get("Resolution", "").strip() != "odpadá"
-            ]
+        for slot in slots.values():
+            substitutions = slot["subs"]
+            general_cancel = slot["cancel"]
 
             if substitutions:
-                update_notes(substitutions, general_cancel)
+                if general_cancel:
+                    substitutions = self._fill_missing_notes(
+                        substitutions, general_cancel
+                    )
                 final_list.extend(substitutions)
             elif general_cancel:
                 final_list.append(general_cancel)
             else:
-                final_list.extend(recs)
+                final_list.extend(slot["other"])
 
         return final_list
 
-    def _export_filename_prefix(self):
-        day_of_week = self.date.isoweekday()
+    def png_dpi(self):
+        """
+        Resolution of the PNG export, `png_dpi` under `settings:` in config.yaml.
 
-        day_names = {
-            1: "po",
-            2: "ut",
-            3: "st",
-            4: "ct",
-            5: "pa",
-            6: "so",
-            7: "ne",
-        }
-
-        return (
-            f"supl_{self.date.strftime('%y-%m-%d')}_{day_names.get(day_of_week, 'x')}"
-        )
+        The pixel count (and the rasterize and compress time) grows with the
+        square of the DPI; 200 is plenty for a screen, the default 600 keeps
+        the pages sharp when zoomed or printed.
+
+        Returns:
+            int: Dots per inch, 600 when not configured or invalid.
+        """
+        raw = self.settings.get("png_dpi", None)
+        if isinstance(raw, str) and raw.strip().isdigit():
+            raw = int(raw)
+        if isinstance(raw, int) and raw > 0:
+            return raw
+        return DEFAULT_PNG_DPI
+
+    def png_workers(self):
+        """
+        Processes rasterizing the PNG pages, `png_workers` under `settings:`
+        in config.yaml; serial by default inside a worker process.
+
+        Returns:
+            int: Maximum number of page processes, 1 rasterizes serially.
+        """
+        raw = self.settings.get("png_workers", None)
+        if isinstance(raw, str) and raw.strip().isdigit():
+            raw = int(raw)
+        if isinstance(raw, int) and raw > 0:
+            return raw
+        if multiprocessing.parent_process() is not None:
+            return 1
+        return os.cpu_count() or 1
 
     def _cleanup(self, extension):
         pattern = os.path.join(
@@ -476,6 +535,31 @@ class SuplovaniZaci(SuplovaniBase):
             except OSError as e:
                 print(f"Error deleting file {file_to_delete}: {e}")
 
+    def _extract_report(self):
+        raw_substitutions = self.filter_records_by_end_period(
+            self.extract_substitutions(), period_key="Period"
+        )
+        substitutions = self.extract_final_substitutions2(raw_substitutions)
+        return substitutions, self.extract_absences()
+
+    def _render_html(self, substitutions, absences):
+        """
+        Render the students template.
+        """
+        template = self._get_template(self.template_folder, "students.html")
+
+        day_of_week = self.date.isoweekday()
+        header_color = _HEADER_COLORS[day_of_week]
+        localized_day = _CZECH_DAYS[day_of_week]
+
+        return template.render(
+            date=self._date_human,
+            substitutions=substitutions,
+            header_color=header_color,
+            absences=absences,
+            day=localized_day,
+        )
+
     def generate(self, output_format):
         """
         Generate the output to a specified format.
@@ -483,94 +567,71 @@ class SuplovaniZaci(SuplovaniBase):
         Currently the function expect the order for some type:
             -> HTML -> PDF -> PNG (subsequent file generation)
         """
-        absences = self.extract_absences()
-        raw_substitutions = self.extract_substitutions()
-        raw_substitutions = self.filter_records_by_end_period(
-            raw_substitutions, period_key="Period"
-        )
-        substitutions = self.extract_final_substitutions2(raw_substitutions)
-
-        self._cleanup(output_format)  # CLEANUP the previous versions
+        # The PDF is overwritten in place (or kept when unchanged, see `_export_pdf`)
+        if output_format != "pdf":
+            self._cleanup(output_format)  # CLEANUP the previous versions
 
         if output_format == "csv":
-            export_to = f"{self._path}/{self._export_filename_prefix()}.csv"
-            csv_substitutions = []
-            for rec in raw_substitutions:
-                csv_rec = dict(rec)
-                csv_rec["Group"] = self._group_to_csv(rec.get("Group", ""))
-                csv_substitutions.append(csv_rec)
-            pd.DataFrame(csv_substitutions).to_csv(export_to, index=False, sep=";")
+            # Raw records (before the merge), written as they are extracted
+            export_to = self._paths["csv"]
+            raw_substitutions = self.iter_records_by_end_period(
+                self._iter_substitutions(), period_key="Period"
+            )
+            csv_substitutions = (
+                rec._replace(Group=self._group_to_csv(rec.Group))._asdict()
+                for rec in raw_substitutions
+            )
+            self._write_csv(export_to, csv_substitutions, SubRec._fields)
             return "CSV file generated."
 
         if output_format == "html":
-            export_to = f"{self._path}/{self._export_filename_prefix()}.html"
-
-            env = Environment(loader=FileSystemLoader(self.template_folder))
-            template = env.get_template("students.html")
-
-            header_colors = {
-                1: "#4f34ca",  # Monday
-                2: "#c038cf",  # Tuesday
-                3: "#FB536A",  # Wednesday
-                4: "#e56e2e",  # Thursday
-                5: "#eaa72f",  # Friday
-                6: "#a0ea48",  # Saturday
-                7: "#19cc59",  # Sunday
-            }
-
-            czech_day_names = {
-                1: "Pondělí",
-                2: "Úterý",
-                3: "Středa",
-                4: "Čtvrtek",
-                5: "Pátek",
-                6: "Sobota",
-                7: "Neděle",
-            }
-
-            # Get values using dictionary lookup with a fallback
-            day_of_week = self.date.isoweekday()
-            header_color = header_colors.get(day_of_week, "#0984e3")
-            localized_day = czech_day_names.get(day_of_week, "Neznámý den")
-
-            html_content = template.render(
-                date=self.date.strftime("%d.%m.%Y"),
-                substitutions=substitutions,
-                header_color=header_color,
-                absences=absences,
-                day=localized_day,
-            )
-
-            with open(export_to, "w", encoding="utf-8") as f:
-                f.write(html_content)
+            export_to = self._paths["html"]
+            Path(export_to).write_text(self._html(), encoding="utf-8")
             return "HTML file generated."
 
         if output_format == "pdf":
-            import_from = f"{self._path}/{self._export_filename_prefix()}.html"
-            export_to = f"{self._path}/{self._export_filename_prefix()}.pdf"
-            HTML(filename=import_from).write_pdf(export_to)
-            return "PDF file generated."
+            export_to = self._paths["pdf"]
+            # Keep the bytes around, the PNG export rasterizes them without
+            # reading the file back
+            self._pdf_bytes = self._export_pdf(export_to, self._html())
+            return (
+                "PDF file is up to date."
+                if self._pdf_bytes is None
+                else "PDF file generated."
+            )
 
         if output_format == "png":
-            pdf = f"{self._path}/{self._export_filename_prefix()}.pdf"
-            export_prefix = f"{self._path}/{self._export_filename_prefix()}"
-
-            doc = pymupdf.open(pdf)
-            desired_dpi = 600
-            zoom = desired_dpi / 72  # 72 DPI is the default resolution
-            mat = pymupdf.Matrix(
-                zoom, zoom
-            )  # Create a transformation matrix for scaling
-            # Loop through each page and save as a PNG image
-            for page_number in range(doc.page_count):
-                page = doc[page_number]
-                # Render the page to an image (pixmap)
-                pix = page.get_pixmap(matrix=mat)
-                # Define output filename
-                output_filename = f"{export_prefix}_{page_number + 1}.png"
-                # Save the image
-                pix.save(output_filename)
-                print(f"Saved {output_filename}")
+            export_prefix = self._paths["png"]
+
+            zoom = self.png_dpi() / 72  # 72 DPI is the default resolution
+
+            pdf_bytes = self._pdf_bytes
+            if pdf_bytes is None:
+                pdf_bytes = Path(self._paths["pdf"]).read_bytes()
+            with pymupdf.open(stream=pdf_bytes, filetype="pdf") as doc:
+                page_count = doc.page_count
+            if page_count == 0:
+                return "No pages."
+
+            output_filenames = [
+                f"{export_prefix}_{page_number}.png"
+                for page_number in range(1, page_count + 1)
+            ]
+            pages = (
+                repeat(pdf_bytes),
+                range(page_count),
+                repeat(zoom),
+                output_filenames,
+            )
+            # The pages are independent, rasterize and compress them in parallel
+            workers = min(page_count, self.png_workers())
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    for output_filename in executor.map(_save_png_page, *pages):
+                        print(f"Saved {output_filename}")
+            else:
+                for output_filename in map(_save_png_page, *pages):
+                    print(f"Saved {output_filename}")
             return "Png(s) generated."
 
         return "Unsupported format!"
@@ -13,12 +13,12 @@ Features:
 
 Classes:
 - `Suplovani`: Handles data extraction and file generation.
+- `TeacherSubRec`: One substitution record (named tuple).
 
 Dependencies:
 - datetime
-- xml.etree.ElementTree (ET)
-- pandas
-- weasyprint
+- lxml.etree (ET, via `SuplovaniBase`)
+- weasyprint (via `SuplovaniBase`)
 - jinja2
 
 Usage Example:
@@ -30,12 +30,28 @@ Usage Example:
 # pylint: disable=R0902
 # pylint: disable=R0801
 
-import pandas as pd
-from weasyprint import HTML
-from jinja2 import Environment, FileSystemLoader
+import os
+from pathlib import Path
+from typing import NamedTuple
 
 from .suplovani_base import SuplovaniBase
-from .settings import Settings
+
+# Columns of the absences CSV export, in the order of the record dicts
+ABSENCE_FIELDS = ("Teacher", "Reason")
+
+
+class TeacherSubRec(NamedTuple):
+    """One teacher substitution record; field names match the CSV columns."""
+
+    Teacher: str
+    Teacher_Abbreviation: str
+    Subject: str
+    Period: str
+    Room: str
+    Class: str
+    Resolution: str
+    Note: str
+
 
 class SuplovaniUcitele(SuplovaniBase):
     """
@@ -50,16 +66,25 @@ class SuplovaniUcitele(SuplovaniBase):
     Attributes:
         xml_file (str): Path to the input XML file.
         template_folder (str): Folder containing Jinja2 templates.
-        tree (ET.ElementTree): Parsed XML tree.
-        root (ET.Element): Root element of the XML tree.
         date (datetime): Date extracted from the XML.
         _path (str): Output directory path for file exports.
     """
 
-    def __init__(self, xml_file, settings: Settings, template_folder="templates"):
-        super().__init__(xml_file, settings, template_folder)
-
-        # Extract mappings
+    INDEXED_TAGS = SuplovaniBase.INDEXED_TAGS + (
+        "Ucitel",
+        "Ucitel2",
+        "TridaSkupinaSeminar",
+        "UdalostStudijniSkupiny",
+        "KalendarovaUdalostMistnost",
+        "SuplovaniDruhAbsence",
+        "AbsenceZdrojeVeDni",
+        "AbsenceUcitele",
+        "VypisSuplovani",
+    )
+
+    def _extract_mappings(self):
+        # pylint: disable=attribute-defined-outside-init
+        super()._extract_mappings()
         self.class_mapping = self._extract_class_mappings()
         self.teacher_mapping = self._extract_teachers()
         self.room_mapping = self._extract_classrooms()
@@ -69,40 +94,23 @@ class SuplovaniUcitele(SuplovaniBase):
 
     def _extract_teachers(self):
         teachers = {}
-        for teacher in self.root.findall(".//Ucitel") + self.root.findall(".//Ucitel2"):
-            teacher_id = (
-                teacher.find("OSOBA_ID").text
-                if teacher.find("OSOBA_ID") is not None
-                else ""
-            )
+        for fields in self._records("Ucitel") + self._records("Ucitel2"):
+            teacher_id = fields.get("OSOBA_ID")
             teacher_name = (
-                f"{teacher.find('Prijmeni').text} {teacher.find('Jmeno').text}"
-                if teacher.find("Prijmeni") is not None
-                and teacher.find("Jmeno") is not None
-                else ""
-            )
-            teacher_short = (
-                teacher.find("Zkratka").text
-                if teacher.find("Zkratka") is not None
+                f"{fields['Prijmeni']} {fields['Jmeno']}".strip()
+                if "Prijmeni" in fields and "Jmeno" in fields
                 else ""
             )
+            teacher_short = fields.get("Zkratka") or ""
             if teacher_id:
                 teachers[teacher_id] = (teacher_name, teacher_short)
         return teachers
 
     def _extract_event_room_mappings(self):
         mappings = {}
-        for event in self.root.findall(".//KalendarovaUdalostMistnost"):
-            event_id = (
-                event.find("UDALOST_ID").text
-                if event.find("UDALOST_ID") is not None
-                else ""
-            )
-            room_id = (
-                event.find("MISTNOST_ID").text
-                if event.find("MISTNOST_ID") is not None
-                else ""
-            )
+        for fields in self._records("KalendarovaUdalostMistnost"):
+            event_id = fields.get("UDALOST_ID")
+            room_id = fields.get("MISTNOST_ID")
             if event_id and room_id:
                 if event_id not in mappings:
                     mappings[event_id] = []
@@ -111,18 +119,10 @@ class SuplovaniUcitele(SuplovaniBase):
 
     def _extract_class_mappings(self):
         mappings = {}
-        for group in self.root.findall(".//TridaSkupinaSeminar"):
-            group_id = (
-                group.find("SKUPINA_ID").text
-                if group.find("SKUPINA_ID") is not None
-                else ""
-            )
-            parent_id = (
-                group.find("SKUPINA_ID_PARENT").text
-                if group.find("SKUPINA_ID_PARENT") is not None
-                else ""
-            )
-            name = group.find("Nazev").text if group.find("Nazev") is not None else ""
+        for fields in self._records("TridaSkupinaSeminar"):
+            group_id = fields.get("SKUPINA_ID")
+            parent_id = fields.get("SKUPINA_ID_PARENT")
+            name = fields.get("Nazev") or ""
             if group_id:
                 if parent_id and parent_id in mappings:
                     mappings[group_id] = f"{mappings[parent_id]} ({name})"
@@ -131,17 +131,17 @@ class SuplovaniUcitele(SuplovaniBase):
         return mappings
 
     def _extract_event_group_mappings(self):
-        return {
-            event.find("UDALOST_ID").text: event.find("SKUPINA_ID").text
-            for event in self.root.findall(".//UdalostStudijniSkupiny")
-            if event.find("UDALOST_ID") is not None
-        }
+        mappings = {}
+        for fields in self._records("UdalostStudijniSkupiny"):
+            if "UDALOST_ID" in fields:
+                mappings[fields["UDALOST_ID"]] = fields.get("SKUPINA_ID")
+        return mappings
 
     def _extract_absence_reasons(self):
-        return {
-            absence.find("SUPL_DRUH_ABSENCE_ID").text: absence.find("Nazev").text
-            for absence in self.root.findall(".//SuplovaniDruhAbsence")
-        }
+        reasons = {}
+        for fields in self._records("SuplovaniDruhAbsence"):
+            reasons[fields.get("SUPL_DRUH_ABSENCE_ID")] = fields.get("Nazev")
+        return reasons
 
     def extract_absences(self):
         """
@@ -163,16 +163,15 @@ class SuplovaniUcitele(SuplovaniBase):
         """
 
         absences = []
-        for absence in self.root.findall(".//AbsenceZdrojeVeDni"):
-            reason_id = (
-                absence.find("SUPL_DRUH_ABSENCE_ID").text
-                if absence.find("SUPL_DRUH_ABSENCE_ID") is not None
-                else ""
-            )
+        teacher_absences = self._teacher_absences_by_event()
+        for fields in self._records("AbsenceZdrojeVeDni"):
+            reason_id = fields.get("SUPL_DRUH_ABSENCE_ID") or ""
             reason = self.absence_reason_mapping.get(reason_id, "Neznámý důvod")
 
-            for teacher_absence in self.root.findall(".//AbsenceUcitele"):
-                teacher_id = teacher_absence.find("OSOBA_ID").text
+            event_id = fields.get("UDALOST_ID") or ""
+            # Only the teachers of this absence event, not every absent teacher
+            for teacher_absence in teacher_absences.get(event_id, ()):
+                teacher_id = teacher_absence.get("OSOBA_ID") or ""
                 teacher_name, _ = self.teacher_mapping.get(
                     teacher_id, ("Neznámý učitel", "")
                 )
@@ -188,87 +187,93 @@ class SuplovaniUcitele(SuplovaniBase):
         teachers, subjects, classrooms, and periods.
 
         Returns:
-            list[dict]: A list of dictionaries, each containing:
-                - "Teacher": Name of the teacher handling the substitution.
-                - "Teacher_Abbreviation": Shortened name of the teacher.
-                - "Subject": Subject of the class.
-                - "Period": The period during which the class occurs.
-                - "Room": Assigned classroom for the class.
-                - "Class": The class or group affected.
-                - "Resolution": How the substitution is handled.
-                - "Note": Additional remarks.
+            list[TeacherSubRec]: A list of records, each containing:
+                - Teacher: Name of the teacher handling the substitution.
+                - Teacher_Abbreviation: Shortened name of the teacher.
+                - Subject: Subject of the class.
+                - Period: The period during which the class occurs.
+                - Room: Assigned classroom for the class.
+                - Class: The class or group affected.
+                - Resolution: How the substitution is handled.
+                - Note: Additional remarks.
 
         Example Output:
             [
-                {
-                    "Teacher": "John Doe",
-                    "Teacher_Abbreviation": "JD",
-                    "Subject": "Mathematics",
-                    "Period": "2nd",
-                    "Room": "101",
-                    "Class": "3A",
-                    "Resolution": "Substituted",
-                    "Note": "Replaced by another teacher"
-                }
+                TeacherSubRec(
+                    Teacher="John Doe",
+                    Teacher_Abbreviation="JD",
+                    Subject="Mathematics",
+                    Period="2nd",
+                    Room="101",
+                    Class="3A",
+                    Resolution="Substituted",
+                    Note="Replaced by another teacher",
+                )
             ]
         """
+        return list(self._iter_substitutions())
+
+    def _iter_substitutions(self):
+        """Yield the substitution records one by one, the CSV export streams them."""
+        # Bind the mappings to locals, they are dereferenced for every record
+        teacher_map = self.teacher_mapping
+        subject_map = self.subject_mapping
+        period_map = self.period_mapping
+        class_map = self.class_mapping
+        udalost_map = self.udalost_mapping
+        event_room = self.event_room_mapping
+        for fields in self._records("VypisSuplovani"):
+            teacher_id = fields.get("OSOBA_ID") or ""
+            subject_id = fields.get("REALIZACE_ID") or ""
+            event_id = fields.get("UDALOST_ID") or ""
+            period_id = fields.get("OBDOBI_DNE_ID") or ""
+            resolution = fields.get("ZpusobReseni") or ""
+            note = fields.get("Poznamka") or ""
+
+            teacher_name, teacher_short = teacher_map.get(teacher_id, ("", ""))
+            subject_name = subject_map.get(subject_id, "")
+            period_name = period_map.get(period_id, "")
+            class_name = class_map.get(udalost_map.get(event_id, ""), "")
+
+            room_list = event_room.get(event_id, [""])
+            room_names = " , ".join(room_list)
 
-        substitutions = []
-        for record in self.root.findall(".//VypisSuplovani"):
-            teacher_id = (
-                record.find("OSOBA_ID").text
-                if record.find("OSOBA_ID") is not None
-                else ""
-            )
-            subject_id = (
-                record.find("REALIZACE_ID").text
-                if record.find("REALIZACE_ID") is not None
-                else ""
-            )
-            event_id = (
-                record.find("UDALOST_ID").text
-                if record.find("UDALOST_ID") is not None
-                else ""
-            )
-            period_id = (
-                record.find("OBDOBI_DNE_ID").text
-                if record.find("OBDOBI_DNE_ID") is not None
-                else ""
-            )
-            resolution = (
-                record.find("ZpusobReseni").text
-                if record.find("ZpusobReseni") is not None
-                else ""
-            )
-            note = (
-                record.find("Poznamka").text
-                if record.find("Poznamka") is not None
-                else ""
+            yield TeacherSubRec(
+                Teacher=teacher_name,
+                Teacher_Abbreviation=teacher_short,
+                Subject=subject_name,
+                Period=period_name,
+                Room=room_names,
+                Class=class_name,
+                Resolution=resolution,
+                Note=note,
             )
 
-            teacher_name, teacher_short = self.teacher_mapping.get(teacher_id, ("", ""))
-            subject_name = self.subject_mapping.get(subject_id, "")
-            period_name = self.period_mapping.get(period_id, "")
-            class_name = self.class_mapping.get(
-                self.udalost_mapping.get(event_id, ""), ""
-            )
+    def _export_filename_prefix(self):
+        """Filename prefix of the exports, e.g. `suplovani_2025_02_25`."""
+        return f"suplovani_{self._date_str}"
 
-            room_list = self.event_room_mapping.get(event_id, [""])
-            room_names = " , ".join(room_list)
+    def _output_paths(self, path):
+        paths = super()._output_paths(path)
+        paths["absences"] = os.path.join(path, f"absences_{self._date_str}.csv")
+        return paths
 
-            substitutions.append(
-                {
-                    "Teacher": teacher_name,
-                    "Teacher_Abbreviation": teacher_short,
-                    "Subject": subject_name,
-                    "Period": period_name,
-                    "Room": room_names,
-                    "Class": class_name,
-                    "Resolution": resolution,
-                    "Note": note,
-                }
-            )
-        return substitutions
+    def _extract_report(self):
+        substitutions = self.filter_records_by_end_period(
+            self.extract_substitutions(), period_key="Period"
+        )
+        return substitutions, self.extract_absences()
+
+    def _render_html(self, substitutions, absences):
+        """
+        Render the teachers template.
+        """
+        template = self._get_template(self.template_folder, "teachers.html")
+        return template.render(
+            date=self._date_human,
+            absences=absences,
+            substitutions=substitutions,
+        )
 
     def generate(self, output_format):
         """
@@ -296,48 +301,31 @@ class SuplovaniUcitele(SuplovaniBase):
             "PDF file generated."
         """
 
-        absences = self.extract_absences()
-        substitutions = self.extract_substitutions()
-        substitutions = self.filter_records_by_end_period(
-            substitutions, period_key="Period"
-        )
-
-        timestamp = self.date.strftime("%Y_%m_%d")
-
         if output_format == "csv":
-            pd.DataFrame(substitutions).to_csv(
-                f"{self._path}/suplovani_{timestamp}.csv",
-                index=False,
-                sep=";",
+            # Written as they are extracted, without a list of all records
+            substitutions = self.iter_records_by_end_period(
+                self._iter_substitutions(), period_key="Period"
             )
-            pd.DataFrame(absences).to_csv(
-                f"{self._path}/absences_{timestamp}.csv",
-                index=False,
-                sep=";",
+            self._write_csv(
+                self._paths["csv"],
+                (rec._asdict() for rec in substitutions),
+                TeacherSubRec._fields,
+            )
+            self._write_csv(
+                self._paths["absences"], self.extract_absences(), ABSENCE_FIELDS
             )
             return "CSV files generated."
 
         if output_format == "html":
-            env = Environment(loader=FileSystemLoader(self.template_folder))
-            template = env.get_template("teachers.html")
-            html_content = template.render(
-                date=self.date.strftime("%d.%m.%Y"),
-                absences=absences,
-                substitutions=substitutions,
-            )
-
-            with open(
-                f"{self._path}/suplovani_{timestamp}.html",
-                "w",
-                encoding="utf-8",
-            ) as f:
-                f.write(html_content)
+            Path(self._paths["html"]).write_text(self._html(), encoding="utf-8")
             return "HTML file generated."
 
         if output_format == "pdf":
-            HTML(filename=f"{self._path}/suplovani_{timestamp}.html").write_pdf(
-                f"{self._path}/suplovani_{timestamp}.pdf"
+            pdf_bytes = self._export_pdf(self._paths["pdf"], self._html())
+            return (
+                "PDF file is up to date."
+                if pdf_bytes is None
+                else "PDF file generated."
             )
-            return "PDF file generated."
 
         return "Unsupported format!"
@@ -8,27 +8,33 @@ students or teachers and processes it accordingly by generating reports
 in CSV, HTML, PDF, and PNG formats.
 
 Features:
-- Watches a folder for new XML files and processes them automatically.
+- Watches a folder for new XML files and processes them automatically
+  (kernel file notifications via watchdog, or polling with `watch_mode: poll`).
 - Supports both teacher and student substitution formats.
 - Generates structured output in multiple formats.
 - Moves processed XML files to a dedicated folder.
+- Processes several XML files in parallel worker processes (`workers`); files
+  of the same type and day are processed one after another.
 
 Configuration:
 - Settings (e.g., watch folder, output folder, check interval) are loaded from `config.yaml`.
 
 Functions:
-- `detect_suplovani_type(xml_file)`: Identifies whether the XML is for students or teachers.
 - `process_suplovani(xml_file)`: Processes the XML file and generates reports.
-- `process_existing_files()`: Processes any XML files already in the watch folder at startup.
-- `monitor_folder()`: Continuously monitors the folder for new XML files.
+- `submit_suplovani(executor, xml_file)`: Queues an XML file in the worker pool.
+- `process_existing_files(executor)`: Processes any XML files already in the watch
+  folder at startup.
+- `watch_folder(executor)`: Processes new XML files as the OS reports them (inotify on Linux).
+- `monitor_folder(executor)`: Continuously polls the folder for new XML files.
 
 Dependencies:
 - os
 - time
 - shutil
+- concurrent.futures
 - yaml
-- xml.etree.ElementTree (ET)
-- suplovani (custom module)
+- watchdog
+- supl (custom module, incl. `detect_suplovani_type`)
 
 Usage:
     $ python monitor.py
@@ -39,11 +45,15 @@ Example config.yaml:
       watch_folder: "./watch"
       output_folder: "./output"
       check_interval: 10
+      watch_mode: events  # or "poll", e.g. for a network share
+      workers: 4  # defaults to the number of CPUs
       output:
         - csv
         - html
         - pdf
         - png
+      png_dpi: 200  # defaults to 600, lower is much faster
+      png_workers: 2  # page processes per PNG export (default 1 in the workers)
       exclude/include:
         - 1A
 """
@@ -51,13 +61,30 @@ Example config.yaml:
 # pylint: disable=R0801
 
 import argparse
+from collections import deque
 import os
+import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, wait
 import shutil
-import xml.etree.ElementTree as ET
 
-from colorama import init, Fore
-from supl import SuplovaniUcitele, SuplovaniZaci, Settings
+from watchdog.events import (
+    FileClosedEvent,
+    FileCreatedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    FileSystemEventHandler,
+)
+from watchdog.observers import Observer
+from supl import (
+    SuplovaniUcitele,
+    SuplovaniZaci,
+    Settings,
+    detect_suplovani_type,
+    export_key,
+)
+from supl.suplovani_base import ET
 
 # Load configuration from YAML file
 config = Settings(config_path="config.yaml", cache_ttl=10)
@@ -65,27 +92,46 @@ config = Settings(config_path="config.yaml", cache_ttl=10)
 # This config options require you to restart the monitor!
 WATCH_FOLDER = config.get("watch_folder")
 CHECK_INTERVAL = config.get("check_interval")
+WATCH_MODE = config.get("watch_mode", "events")
+WORKERS = config.get("workers") or os.cpu_count()
 PROCESSED_FOLDER = os.path.join(WATCH_FOLDER, "processed")
 
 # Ensure processed folder exists
 os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 
-# Enable colored terminal output
-init(autoreset=True)
+# ANSI colours for the console output
+RED = "\x1b[31m"
+GREEN = "\x1b[32m"
+YELLOW = "\x1b[33m"
+BLUE = "\x1b[34m"
+MAGENTA = "\x1b[35m"
+CYAN = "\x1b[36m"
+LIGHTGREEN = "\x1b[92m"
+RESET = "\x1b[0m"
 
 
-def detect_suplovani_type(xml_file):
+# Export key (type, day) -> files waiting for the running export of that key
+_LANES = {}
+_LANES_LOCK = threading.Lock()
+
+
+def _enable_ansi():
     """
-    Detects if the XML file is for students or teachers.
+    Switch on the ANSI escape processing of the Windows console (no-op elsewhere).
     """
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+    if sys.platform != "win32":
+        return
+    import ctypes  # pylint: disable=import-outside-toplevel
 
-    if root.find(".//VypisSuplovaniZaka") is not None:
-        return "students"
-    if root.find(".//VypisSuplovani") is not None:
-        return "teachers"
-    return None
+    kernel32 = ctypes.windll.kernel32
+    stdout = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    mode = ctypes.c_uint32()
+    if kernel32.GetConsoleMode(stdout, ctypes.byref(mode)):
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        kernel32.SetConsoleMode(stdout, mode.value | 0x0004)
+
+
+_enable_ansi()
 
 
 def process_suplovani(xml_file):
@@ -95,56 +141,258 @@ def process_suplovani(xml_file):
     suplovani_type = detect_suplovani_type(xml_file)
 
     if suplovani_type is None:
-        print(Fore.RED + "📂 Unknown XML, skipping ...")
+        print(f"{RED}📂 Unknown XML, skipping ...{RESET}")
         return
 
     if suplovani_type == "teachers":
-        print(Fore.LIGHTGREEN_EX + "📂 Detected 'TEACHERS' suplování XML")
+        print(f"{LIGHTGREEN}📂 Detected 'TEACHERS' suplování XML{RESET}")
         supl = SuplovaniUcitele(xml_file, config)
     else:
-        print(Fore.GREEN + "📂 Detected 'STUDENTS' suplování XML")
+        print(f"{GREEN}📂 Detected 'STUDENTS' suplování XML{RESET}")
         supl = SuplovaniZaci(xml_file, config)
 
     supl.export_path(config.get("output_folder", "./outputs"))
 
     for f in config.get("output"):
-        print(Fore.YELLOW + supl.generate(f))
+        print(f"{YELLOW}{supl.generate(f)}{RESET}")
 
     # Move processed file
     shutil.move(xml_file, os.path.join(PROCESSED_FOLDER, os.path.basename(xml_file)))
-    print(Fore.MAGENTA + f"📂 Moved {xml_file} to {PROCESSED_FOLDER}")
+    print(f"{MAGENTA}📂 Moved {xml_file} to {PROCESSED_FOLDER}{RESET}")
+
+
+def _process_in_worker(xml_file):
+    """
+    Run `process_suplovani` in a worker process and report its errors there.
+
+    Some exceptions (e.g. the lxml syntax errors) cannot be pickled back to
+    the main process, and one broken XML must not stop the monitor.
+
+    Returns:
+        bool: True when the file was processed.
+    """
+    try:
+        process_suplovani(xml_file)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        print(f"{RED}❌ Processing of {xml_file} failed: {error}{RESET}")
+        return False
+    return True
+
+
+def _submit(executor, xml_file):
+    """
+    Queue the XML file in the worker pool, its completion is logged once done.
+    """
+    name = os.path.basename(xml_file)
+    started = time.perf_counter()
+
+    def log_completion(future):
+        if not future.cancelled() and future.exception() is None and future.result():
+            elapsed = time.perf_counter() - started
+            print(f"{BLUE}✅ {name} done in {elapsed:.1f} s{RESET}")
+
+    future = executor.submit(_process_in_worker, xml_file)
+    future.add_done_callback(log_completion)
+    return future
+
+
+def _run_lane(executor, key, xml_file):
+    """
+    Process the files of one export key in arrival order, one at a time.
+    """
+    while True:
+        try:
+            wait((_submit(executor, xml_file),))
+        except RuntimeError:  # the pool is shutting down
+            with _LANES_LOCK:
+                del _LANES[key]
+            return
+        with _LANES_LOCK:
+            waiting = _LANES[key]
+            if not waiting:
+                del _LANES[key]
+                return
+            xml_file = waiting.popleft()
+
+
+def submit_suplovani(executor, xml_file):
+    """
+    Queue the XML file for `process_suplovani` in a worker process; files of
+    the same type and day run one after another in arrival order.
+    """
+    try:
+        key = export_key(xml_file)
+    except (ET.ParseError, OSError):
+        key = None  # the worker reports the error
+    if key is None:
+        _submit(executor, xml_file)
+        return
+
+    with _LANES_LOCK:
+        waiting = _LANES.get(key)
+        if waiting is not None:
+            if xml_file not in waiting:
+                waiting.append(xml_file)
+                print(
+                    f"{CYAN}⏳ {os.path.basename(xml_file)} waits for the "
+                    f"running export of the same day{RESET}"
+                )
+            return
+        _LANES[key] = deque()
+    threading.Thread(
+        target=_run_lane, args=(executor, key, xml_file), daemon=True
+    ).start()
+
+
+def _xml_entries():
+    """
+    List the XML files in the watch folder as `os.DirEntry` objects, oldest first.
+    """
+    # scandir order is arbitrary, same-day exports must be queued in order
+    with os.scandir(WATCH_FOLDER) as it:
+        entries = [e for e in it if e.name.endswith(".xml") and e.is_file()]
+    entries.sort(key=lambda e: (e.stat().st_mtime_ns, e.name))
+    return entries
 
 
-def process_existing_files():
+def process_existing_files(executor):
     """
     Process all existing XML files in the watch folder on startup.
     """
-    print(Fore.YELLOW + "🔄 Processing existing XML files...")
-    for file in os.listdir(WATCH_FOLDER):
-        file_path = os.path.join(WATCH_FOLDER, file)
-        if file.endswith(".xml"):
-            print(Fore.CYAN + f"📂 Processing existing XML: {file}")
-            process_suplovani(file_path)
+    print(f"{YELLOW}🔄 Processing existing XML files...{RESET}")
+    for entry in _xml_entries():
+        print(f"{CYAN}📂 Processing existing XML: {entry.name}{RESET}")
+        submit_suplovani(executor, entry.path)
 
 
-def monitor_folder():
+def monitor_folder(executor):
     """
     Monitor a folder for new XML files and process them.
     """
-    processed_files = set(os.listdir(WATCH_FOLDER))
+    processed_files = {e.name for e in _xml_entries()}
+    seen_mtime = None
 
     while True:
         time.sleep(CHECK_INTERVAL)
-        current_files = set(os.listdir(WATCH_FOLDER))
-        new_files = current_files - processed_files
+        # Adding, removing or renaming a file updates the folder mtime, an
+        # idle tick costs one stat() instead of listing the folder
+        mtime = os.stat(WATCH_FOLDER).st_mtime_ns
+        if mtime == seen_mtime:
+            continue
+        # Trust the mtime only once it is older than the coarsest timestamp
+        # resolution (2 s on FAT), a file added in the same tick would be missed
+        seen_mtime = mtime if time.time_ns() - mtime > 2_000_000_000 else None
+
+        entries = _xml_entries()
+        current_files = {e.name for e in entries}
+
+        for entry in entries:
+            if entry.name not in processed_files:
+                print(f"{GREEN}📂 New XML detected: {entry.name}{RESET}")
+                submit_suplovani(executor, entry.path)
 
-        for file in new_files:
-            if file.endswith(".xml"):
-                file_path = os.path.join(WATCH_FOLDER, file)
-                print(Fore.GREEN + f"📂 New XML detected: {file}")
-                process_suplovani(file_path)
+        processed_files = current_files
 
-    processed_files = current_files
+
+class XmlEventHandler(FileSystemEventHandler):
+    """
+    Processes XML files once they are completely written to the watch folder
+    (or moved into it).
+
+    Where the OS does not report the close of a written file, created and
+    modified files wait until `submit_settled` sees them unchanged.
+    """
+
+    def __init__(self, executor):
+        super().__init__()
+        self.executor = executor
+        self._unsettled = {}  # path -> (size, mtime) seen by the last check
+        self._lock = threading.Lock()
+
+    def on_closed(self, event):
+        self._handle(event.src_path)
+
+    def on_created(self, event):
+        self._mark_unsettled(event.src_path)
+
+    def on_modified(self, event):
+        self._mark_unsettled(event.src_path)
+
+    def on_moved(self, event):
+        self._handle(event.dest_path)
+
+    def _mark_unsettled(self, file_path):
+        if _is_watched_xml(file_path):
+            with self._lock:
+                self._unsettled[file_path] = None
+
+    def submit_settled(self):
+        """
+        Submit the files whose size and mtime did not change since the last call.
+        """
+        settled = []
+        with self._lock:
+            for file_path, seen in list(self._unsettled.items()):
+                try:
+                    stat = os.stat(file_path)
+                except OSError:  # removed or moved away meanwhile
+                    del self._unsettled[file_path]
+                    continue
+                current = (stat.st_size, stat.st_mtime_ns)
+                if current == seen:
+                    del self._unsettled[file_path]
+                    settled.append(file_path)
+                else:
+                    self._unsettled[file_path] = current
+        for file_path in settled:
+            self._handle(file_path)
+
+    def _handle(self, file_path):
+        if not _is_watched_xml(file_path):
+            return
+        print(f"{GREEN}📂 New XML detected: {os.path.basename(file_path)}{RESET}")
+        submit_suplovani(self.executor, file_path)
+
+
+def _is_watched_xml(file_path):
+    # Ignore other files and anything outside the folder itself
+    # (e.g. moves into the processed subfolder)
+    if not file_path.endswith(".xml") or not os.path.isfile(file_path):
+        return False
+    return os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(WATCH_FOLDER)
+
+
+def watch_folder(executor):
+    """
+    Watch a folder for new XML files and process them as the OS reports them.
+    """
+    # Subscribe only to the events we act on. inotify (Linux) reports when a
+    # written file is closed (IN_CLOSE_WRITE), and with full events a file
+    # moved in from elsewhere is a move (IN_MOVED_TO), not a creation. Other
+    # platforms report a creation before the file is written, those files
+    # are submitted once their modifications settle.
+    if sys.platform.startswith("linux"):
+        observer = Observer(generate_full_events=True)
+        event_filter = [FileClosedEvent, FileMovedEvent]
+    else:
+        observer = Observer()
+        event_filter = [FileCreatedEvent, FileModifiedEvent, FileMovedEvent]
+
+    handler = XmlEventHandler(executor)
+    observer.schedule(
+        handler,
+        WATCH_FOLDER,
+        recursive=False,
+        event_filter=event_filter,
+    )
+    observer.start()
+    try:
+        while observer.is_alive():
+            observer.join(1)
+            handler.submit_settled()
+    finally:
+        observer.stop()
+        observer.join()
 
 
 def build_parser():
@@ -160,8 +408,12 @@ def build_parser():
 if __name__ == "__main__":
     try:
         build_parser().parse_known_args()
-        print(Fore.MAGENTA + f"🔍 Monitoring folder: {WATCH_FOLDER}")
-        process_existing_files()
-        monitor_folder()
+        print(f"{MAGENTA}🔍 Monitoring folder: {WATCH_FOLDER}{RESET}")
+        with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+            process_existing_files(pool)
+            if WATCH_MODE == "poll":
+                monitor_folder(pool)
+            else:
+                watch_folder(pool)
     except KeyboardInterrupt:
-        print(Fore.BLUE + "\n🛑 Monitoring stopped by user.")
+        print(f"{BLUE}\n🛑 Monitoring stopped by user.{RESET}")
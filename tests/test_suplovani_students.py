@@ -0,0 +1,55 @@
+"""Tests of the students substitution extraction."""
+
+import os
+import tempfile
+import unittest
+
+from supl import Settings, SuplovaniZaci
+
+XML = """<NewDataSet>
+<Kalendar><Datum>2025-02-25T00:00:00+01:00</Datum></Kalendar>
+<SuplovaniDruhAbsence>
+  <SUPL_DRUH_ABSENCE_ID>r1</SUPL_DRUH_ABSENCE_ID><Nazev>Nemoc</Nazev>
+</SuplovaniDruhAbsence>
+<Ucitel>
+  <OSOBA_ID>t1</OSOBA_ID><Jmeno/><Prijmeni>Novak</Prijmeni><Zkratka>NOV</Zkratka>
+</Ucitel>
+<Ucitel>
+  <OSOBA_ID>t2</OSOBA_ID><Prijmeni>Dvorak</Prijmeni><Zkratka>DVO</Zkratka>
+</Ucitel>
+<AbsenceZdrojeVeDni>
+  <SUPL_DRUH_ABSENCE_ID>r1</SUPL_DRUH_ABSENCE_ID><UDALOST_ID>a1</UDALOST_ID>
+  <Od>2025-02-25T07:55:00</Od><Do>2025-02-25T10:20:00</Do>
+</AbsenceZdrojeVeDni>
+<AbsenceUcitele><UDALOST_ID>a1</UDALOST_ID><OSOBA_ID>t1</OSOBA_ID></AbsenceUcitele>
+<AbsenceUcitele><UDALOST_ID>a1</UDALOST_ID><OSOBA_ID>t2</OSOBA_ID></AbsenceUcitele>
+</NewDataSet>
+"""
+
+
+class ExtractAbsencesTest(unittest.TestCase):
+    """Absent teachers with incomplete records."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.addCleanup(tmp.cleanup)
+        xml_file = os.path.join(tmp.name, "students.xml")
+        with open(xml_file, "w", encoding="utf-8") as f:
+            f.write(XML)
+        settings = Settings(os.path.join(tmp.name, "config.yaml"))
+        self.suplovani = SuplovaniZaci(xml_file, settings)
+
+    def test_empty_first_name_is_kept(self):
+        """An empty <Jmeno/> is an empty name, not a missing one."""
+        teacher = self.suplovani.teacher_mapping["t1"]
+        self.assertEqual(teacher, {"abbreviation": "NOV", "name": "Novak"})
+
+    def test_unmapped_teacher_is_skipped(self):
+        """t2 has no <Jmeno>, it is not mapped and must not break the export."""
+        absences = self.suplovani.extract_absences()
+        self.assertEqual([a["Teacher"] for a in absences], ["Novak"])
+        self.assertEqual(absences[0]["Reason"], "Nemoc")
+
+
+if __name__ == "__main__":
+    unittest.main()